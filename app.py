@@ -1,29 +1,24 @@
 #!/usr/bin/env python3
 import streamlit as st
+import hashlib
 import os
 import re
-import contextlib
 import json
+from datetime import datetime, timedelta
 from urllib.parse import urlparse
 from blog_orchestrator import BlogAgentOrchestrator
 from sheets_manager import create_sheets_manager
 from keyword_research import create_keyword_researcher
 
-@contextlib.contextmanager
-def temporary_env_var(key, value):
-    """Securely set temporary environment variable with guaranteed cleanup."""
-    old_value = os.environ.get(key)
-    try:
-        os.environ[key] = value
-        yield
-    finally:
-        if old_value is None:
-            os.environ.pop(key, None)
-        else:
-            os.environ[key] = old_value
-
+@st.cache_data(ttl=300, show_spinner=False)
 def validate_blog_url(url):
-    """Validate and sanitize blog URL input to prevent SSRF attacks."""
+    """Validate and sanitize blog URL input to prevent SSRF attacks.
+
+    Cached on the raw input text: Streamlit re-runs the whole script on
+    every widget interaction, and this check does blocking DNS resolution,
+    so an unchanged URL should not pay for it twice. Failures are not
+    cached, and the short TTL keeps the DNS answer reasonably fresh.
+    """
     import ipaddress
     import socket
 
@@ -116,11 +111,106 @@ def validate_blog_url(url):
 
     return url
 
+@st.cache_resource(show_spinner=False)
+def _build_orchestrator(model, api_key_digest, _api_key):
+    """Build and cache one BlogAgentOrchestrator per (model, key digest).
+
+    The orchestrator owns the agent definitions and the execution thread
+    pool, so rebuilding it on every button click threw away warm HTTP
+    connections and leaked short-lived pools. The raw key stays out of the
+    cache key thanks to the underscore prefix; the digest stands in for it
+    so entering a different key builds a fresh orchestrator. Each
+    orchestrator re-asserts its own key before every run, since the SDK's
+    default key is process-global and last-set-wins.
+    """
+    return BlogAgentOrchestrator(model=model, api_key=_api_key)
+
+def get_orchestrator(model, api_key):
+    """Fetch the shared orchestrator for this model and API key."""
+    digest = hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+    return _build_orchestrator(model, digest, api_key)
+
+@st.cache_data(show_spinner=False)
+def build_html_export(topic, final_content):
+    """Render the downloadable HTML export, cached on (topic, content).
+
+    Streamlit needs the download payload up front, but reruns with unchanged
+    content should not repeat the markdown-to-HTML conversion.
+    """
+    import markdown
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{topic}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; line-height: 1.6; }}
+        h1, h2, h3 {{ color: #333; }}
+        code {{ background-color: #f4f4f4; padding: 2px 4px; border-radius: 3px; }}
+        pre {{ background-color: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }}
+        blockquote {{ border-left: 4px solid #ddd; margin: 0; padding-left: 20px; font-style: italic; }}
+        a {{ color: #0066cc; text-decoration: none; }}
+        a:hover {{ text-decoration: underline; }}
+    </style>
+</head>
+<body>
+{markdown.markdown(final_content)}
+</body>
+</html>"""
+
+@st.fragment
+def render_content_history(sheets_manager):
+    """Render the content-history section as an isolated fragment.
+
+    The expanders and 'View Content' buttons inside only rerun this
+    fragment, so browsing history no longer re-executes the whole script
+    (and with it the Sheets connection checks and input validation).
+    """
+    st.header("📋 Content History")
+
+    try:
+        history = sheets_manager.get_content_history(limit=10)
+        if history:
+            for item in history:
+                with st.expander(f"📝 {item['Topic']} ({item['Date_Created']})"):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Source Blog", item['Source_Blog'])
+                    with col2:
+                        st.metric("Word Count", item['Word_Count'])
+                    with col3:
+                        st.metric("SEO Score", item['SEO_Score'] if item['SEO_Score'] else 'N/A')
+
+                    if st.button(f"📄 View Content", key=f"view_{item['ID']}"):
+                        st.markdown("### Generated Content")
+                        st.markdown(item['Final_Content'])
+        else:
+            st.info("No content history found")
+
+        # Blog source statistics
+        st.subheader("📊 Blog Source Performance")
+        source_stats = sheets_manager.get_blog_source_stats()
+        if source_stats:
+            for source in source_stats[:5]:  # Show top 5
+                st.write(f"**{source['Domain']}** - Success: {source['Success_Count']}, Last used: {source['Last_Analyzed']}")
+        else:
+            st.info("No blog source statistics available")
+    except Exception as e:
+        st.error(f"❌ Could not load content history: {str(e)}")
+
 # Security constants
 MAX_TOPIC_LENGTH = 500
 MAX_REQUIREMENTS_LENGTH = 2000
 MAX_API_KEY_LENGTH = 200
 
+# Static footer markup, built once at import instead of per rerun
+FOOTER_HTML = """
+<div style='text-align: center; color: gray; padding: 2rem 0;'>
+<p>Powered by OpenAI Agents SDK | Built by <a href="https://www.bertramlabs.com" target="_blank" style="color: #2D5DA8; text-decoration: none; font-weight: bold;">Bertram Labs</a></p>
+<p style='font-size: 0.9rem; margin-top: 0.5rem;'>Professional AI Solutions & Custom Development</p>
+</div>
+"""
+
 def main():
     """Streamlit web app entry point - renders the blog generation interface."""
     st.set_page_config(
@@ -357,107 +447,110 @@ def main():
                 st.error("⚠️ Please enter your OpenAI API key first")
             else:
                 with st.spinner("Generating topic ideas..."):
-                    with temporary_env_var("OPENAI_API_KEY", api_key):
-                        orchestrator = BlogAgentOrchestrator(model=model)
+                    orchestrator = get_orchestrator(model, api_key)
 
-                        # Generate topics
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
+                    # Generate topics
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
+
+                    def update_status(message, progress):
+                        status_text.text(message)
+                        progress_bar.progress(progress)
 
-                        def update_status(message, progress):
-                            status_text.text(message)
-                            progress_bar.progress(progress)
+                    # Get or extract existing blog topics for duplication checking
+                    existing_topics = []
+                    if sheets_manager:
+                        try:
+                            status_text.text("📚 Checking for cached blog topics...")
+                            cached = sheets_manager.get_cached_blog_topics(reference_blog)
 
-                        # Get or extract existing blog topics for duplication checking
-                        existing_topics = []
-                        if sheets_manager:
-                            try:
-                                status_text.text("📚 Checking for cached blog topics...")
-                                cached = sheets_manager.get_cached_blog_topics(reference_blog)
-
-                                if cached:
-                                    # Check if cache is fresh (< 7 days)
-                                    from datetime import datetime, timedelta
-                                    try:
-                                        last_updated = datetime.strptime(cached['last_updated'], '%Y-%m-%d %H:%M:%S')
-                                        if datetime.now() - last_updated < timedelta(days=7):
-                                            existing_topics = cached['topics']
-                                            st.info(f"📚 Using cached topics ({len(existing_topics)} titles)")
-                                        else:
-                                            # Cache is stale, extract fresh topics
-                                            status_text.text("📰 Extracting fresh blog topics...")
-                                            existing_topics = orchestrator.extract_blog_topics(reference_blog)
-                                            if existing_topics:
-                                                sheets_manager.save_blog_topics(reference_blog, existing_topics)
-                                    except:
-                                        # Invalid timestamp, extract fresh
-                                        status_text.text("📰 Extracting blog topics...")
+                            if cached:
+                                # Check if cache is fresh (< 7 days)
+                                try:
+                                    last_updated = datetime.strptime(cached['last_updated'], '%Y-%m-%d %H:%M:%S')
+                                    if datetime.now() - last_updated < timedelta(days=7):
+                                        existing_topics = cached['topics']
+                                        st.info(f"📚 Using cached topics ({len(existing_topics)} titles)")
+                                    else:
+                                        # Cache is stale, extract fresh topics
+                                        status_text.text("📰 Extracting fresh blog topics...")
                                         existing_topics = orchestrator.extract_blog_topics(reference_blog)
                                         if existing_topics:
                                             sheets_manager.save_blog_topics(reference_blog, existing_topics)
-                                else:
-                                    # No cache, extract for first time
+                                except:
+                                    # Invalid timestamp, extract fresh
                                     status_text.text("📰 Extracting blog topics...")
                                     existing_topics = orchestrator.extract_blog_topics(reference_blog)
                                     if existing_topics:
                                         sheets_manager.save_blog_topics(reference_blog, existing_topics)
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not extract blog topics: {str(e)}")
-
-                        # Combine user keywords with trending keywords
-                        all_keywords = []
-
-                        # Add user-provided target keywords (highest priority)
-                        if target_keywords.strip():
-                            user_keywords = [kw.strip() for kw in target_keywords.split(',') if kw.strip()]
-                            all_keywords.extend(user_keywords)
-
-                        # Fetch trending keywords to supplement user keywords
-                        if keyword_researcher:
-                            try:
-                                status_text.text("🔍 Fetching trending keywords...")
-                                # Extract a seed keyword from the reference blog domain
-                                import re
-                                domain_match = re.search(r'https?://(?:www\.)?([^/]+)', reference_blog)
-                                if domain_match:
-                                    domain = domain_match.group(1).split('.')[0]
-                                    trending_keywords = keyword_researcher.get_related_queries(domain)
-                                    # Add trending keywords (avoid duplicates)
-                                    for kw in trending_keywords:
-                                        if kw.lower() not in [k.lower() for k in all_keywords]:
-                                            all_keywords.append(kw)
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not fetch trending keywords: {str(e)}")
+                            else:
+                                # No cache, extract for first time
+                                status_text.text("📰 Extracting blog topics...")
+                                existing_topics = orchestrator.extract_blog_topics(reference_blog)
+                                if existing_topics:
+                                    sheets_manager.save_blog_topics(reference_blog, existing_topics)
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not extract blog topics: {str(e)}")
+
+                    # Combine user keywords with trending keywords, tracking a
+                    # lowercase seen-set so dedup stays linear
+                    all_keywords = []
+                    seen_keywords = set()
+
+                    # Add user-provided target keywords (highest priority)
+                    if target_keywords.strip():
+                        for kw in target_keywords.split(','):
+                            kw = kw.strip()
+                            if kw and kw.lower() not in seen_keywords:
+                                seen_keywords.add(kw.lower())
+                                all_keywords.append(kw)
+
+                    # Fetch trending keywords to supplement user keywords
+                    if keyword_researcher:
+                        try:
+                            status_text.text("🔍 Fetching trending keywords...")
+                            # Extract a seed keyword from the reference blog domain
+                            domain_match = re.search(r'https?://(?:www\.)?([^/]+)', reference_blog)
+                            if domain_match:
+                                domain = domain_match.group(1).split('.')[0]
+                                trending_keywords = keyword_researcher.get_related_queries(domain)
+                                # Add trending keywords (avoid duplicates)
+                                for kw in trending_keywords:
+                                    if kw.lower() not in seen_keywords:
+                                        seen_keywords.add(kw.lower())
+                                        all_keywords.append(kw)
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not fetch trending keywords: {str(e)}")
 
-                        # Generate topics informed by all keywords, product target, and existing topics
-                        topics = orchestrator.generate_topic_ideas(
-                            reference_blog,
-                            preferences="",
-                            status_callback=update_status,
-                            trending_keywords=all_keywords if all_keywords else None,
-                            product_target=product_target.strip() if product_target.strip() else None,
-                            existing_topics=existing_topics if existing_topics else None
-                        )
+                    # Generate topics informed by all keywords, product target, and existing topics
+                    topics = orchestrator.generate_topic_ideas(
+                        reference_blog,
+                        preferences="",
+                        status_callback=update_status,
+                        trending_keywords=all_keywords if all_keywords else None,
+                        product_target=product_target.strip() if product_target.strip() else None,
+                        existing_topics=existing_topics if existing_topics else None
+                    )
 
-                        # Enrich with detailed keyword data
-                        if keyword_researcher and topics:
-                            status_text.text("🔍 Enriching with keyword research data...")
-                            topics = keyword_researcher.enrich_topics_with_keyword_data(topics)
+                    # Enrich with detailed keyword data
+                    if keyword_researcher and topics:
+                        status_text.text("🔍 Enriching with keyword research data...")
+                        topics = keyword_researcher.enrich_topics_with_keyword_data(topics)
 
-                        # Store in session state
-                        st.session_state.generated_topics = topics
-                        st.session_state.topic_gen_product_target = product_target.strip() if product_target.strip() else ""
-                        status_text.empty()
-                        progress_bar.empty()
+                    # Store in session state
+                    st.session_state.generated_topics = topics
+                    st.session_state.topic_gen_product_target = product_target.strip() if product_target.strip() else ""
+                    status_text.empty()
+                    progress_bar.empty()
 
-                        # Save to Google Sheets if enabled
-                        if sheets_manager and topics:
-                            try:
-                                status_text.text("💾 Saving topics to Google Sheets...")
-                                sheets_manager.save_topic_ideas(reference_blog, topics)
-                                st.success("✅ Topics saved to Google Sheets!")
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not save topics to Sheets: {str(e)}")
+                    # Save to Google Sheets if enabled
+                    if sheets_manager and topics:
+                        try:
+                            status_text.text("💾 Saving topics to Google Sheets...")
+                            sheets_manager.save_topic_ideas(reference_blog, topics)
+                            st.success("✅ Topics saved to Google Sheets!")
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not save topics to Sheets: {str(e)}")
 
 
         # Display generated topics
@@ -576,75 +669,90 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
                 return
 
             try:
-                # Use secure context manager for API key
-                with temporary_env_var("OPENAI_API_KEY", api_key):
-                    # Initialize orchestrator with selected model
-                    orchestrator = BlogAgentOrchestrator(model=model)
+                # Reuse the cached orchestrator for the selected model
+                orchestrator = get_orchestrator(model, api_key)
 
-                    # Progress tracking
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
+                # Progress tracking
+                progress_bar = st.progress(0)
+                status_text = st.empty()
 
-                    # Callback function to update status
-                    def update_status(message, progress):
-                        status_text.text(message)
-                        progress_bar.progress(progress)
+                # Callback function to update status
+                def update_status(message, progress):
+                    status_text.text(message)
+                    progress_bar.progress(progress)
 
-                    # Parse specific reference pages
-                    specific_pages_list = None
-                    if reference_pages.strip():
-                        # Split by newlines and filter empty lines
-                        specific_pages_list = [page.strip() for page in reference_pages.split('\n') if page.strip()]
+                # Live preview of the draft as the writer streams tokens
+                stream_placeholder = st.empty()
 
-                    # Check for cached style guide if sheets enabled
-                    cached_style = None
-                    if sheets_manager:
-                        try:
-                            update_status("🔍 Checking for cached style guide...", 5)
-                            cached_style = sheets_manager.get_cached_style_guide(reference_blog)
-                            if cached_style:
-                                st.info(f"📋 Using cached style guide for {reference_blog} (last updated: {cached_style['last_updated']})")
-                        except Exception as e:
-                            st.warning(f"⚠️ Could not access cached style guide: {str(e)}")
-                            cached_style = None
-
-                    # Generate blog post with real-time updates
-                    results = orchestrator.create_blog_post(
-                        topic=topic,
-                        reference_blog=reference_blog,
-                        requirements=requirements,
-                        status_callback=update_status,
-                        cached_style_guide=cached_style['style_guide'] if cached_style else None,
-                        product_target=blog_product_target.strip() if blog_product_target.strip() else None,
-                        specific_pages=specific_pages_list
-                    )
+                def stream_preview(partial_text):
+                    stream_placeholder.markdown(partial_text + " ▌")
 
-                    # Save results to sheets if enabled
-                    if sheets_manager and "error" not in results:
-                        try:
-                            update_status("💾 Saving to Google Sheets...", 95)
+                # Parse specific reference pages
+                specific_pages_list = None
+                if reference_pages.strip():
+                    # Split by newlines and filter empty lines
+                    specific_pages_list = [page.strip() for page in reference_pages.split('\n') if page.strip()]
 
-                            # Save style guide if it was freshly generated
-                            if not cached_style and "style_guide" in results:
-                                sheets_manager.save_style_guide(
-                                    reference_blog,
-                                    results["style_guide"]
-                                )
+                # Check for cached style guide if sheets enabled
+                cached_style = None
+                if sheets_manager:
+                    try:
+                        update_status("🔍 Checking for cached style guide...", 5)
+                        cached_style = sheets_manager.get_cached_style_guide(reference_blog)
+                        if cached_style:
+                            st.info(f"📋 Using cached style guide for {reference_blog} (last updated: {cached_style['last_updated']})")
+                    except Exception as e:
+                        st.warning(f"⚠️ Could not access cached style guide: {str(e)}")
+                        cached_style = None
+
+                # Without a Sheets-cached guide, the orchestrator runs style
+                # analysis concurrently with research and memoizes the result
+                # in its own response cache, so repeat runs against the same
+                # blog still skip the style agent.
+
+                # Generate blog post with real-time updates
+                results = orchestrator.create_blog_post(
+                    topic=topic,
+                    reference_blog=reference_blog,
+                    requirements=requirements,
+                    status_callback=update_status,
+                    cached_style_guide=cached_style['style_guide'] if cached_style else None,
+                    product_target=blog_product_target.strip() if blog_product_target.strip() else None,
+                    specific_pages=specific_pages_list,
+                    stream_callback=stream_preview
+                )
+
+                # Clear the streaming preview; the final tabs render below
+                stream_placeholder.empty()
 
-                            # Save generated content
-                            sheets_manager.save_generated_content(
-                                topic,
+                # Save results to sheets if enabled
+                if sheets_manager and "error" not in results:
+                    try:
+                        update_status("💾 Saving to Google Sheets...", 95)
+
+                        # Save style guide if it was freshly generated
+                        # (never persist the failure placeholder)
+                        if (not cached_style and "style_guide" in results
+                                and not results["style_guide"].startswith("Style analysis failed")):
+                            sheets_manager.save_style_guide(
                                 reference_blog,
-                                results
+                                results["style_guide"]
                             )
 
-                            # Update blog source stats
-                            sheets_manager.update_blog_source_stats(reference_blog, success=True)
+                        # Save generated content
+                        sheets_manager.save_generated_content(
+                            topic,
+                            reference_blog,
+                            results
+                        )
 
-                            st.success("✅ Content saved to Google Sheets!")
-                        except Exception as e:
-                            st.warning(f"⚠️ Could not save to Google Sheets: {str(e)}")
-                            # Continue without failing the entire operation
+                        # Update blog source stats
+                        sheets_manager.update_blog_source_stats(reference_blog, success=True)
+
+                        st.success("✅ Content saved to Google Sheets!")
+                    except Exception as e:
+                        st.warning(f"⚠️ Could not save to Google Sheets: {str(e)}")
+                        # Continue without failing the entire operation
                 
                 # Display results
                 if "error" in results:
@@ -706,28 +814,9 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
                             )
                         
                         with col3:
-                            # Convert markdown to HTML for download
+                            # Convert markdown to HTML for download (cached)
                             try:
-                                import markdown
-                                html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{topic}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; line-height: 1.6; }}
-        h1, h2, h3 {{ color: #333; }}
-        code {{ background-color: #f4f4f4; padding: 2px 4px; border-radius: 3px; }}
-        pre {{ background-color: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }}
-        blockquote {{ border-left: 4px solid #ddd; margin: 0; padding-left: 20px; font-style: italic; }}
-        a {{ color: #0066cc; text-decoration: none; }}
-        a:hover {{ text-decoration: underline; }}
-    </style>
-</head>
-<body>
-{markdown.markdown(final_content)}
-</body>
-</html>"""
+                                html_content = build_html_export(topic, final_content)
                                 st.download_button(
                                     label="🌐 Download as HTML",
                                     data=html_content,
@@ -912,49 +1001,11 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
 
     # Show content history if sheets enabled
     if sheets_manager and st.checkbox("📋 Show Content History", value=False):
-        st.header("📋 Content History")
-
-        try:
-            history = sheets_manager.get_content_history(limit=10)
-            if history:
-                for item in history:
-                    with st.expander(f"📝 {item['Topic']} ({item['Date_Created']})"):
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Source Blog", item['Source_Blog'])
-                        with col2:
-                            st.metric("Word Count", item['Word_Count'])
-                        with col3:
-                            st.metric("SEO Score", item['SEO_Score'] if item['SEO_Score'] else 'N/A')
-
-                        if st.button(f"📄 View Content", key=f"view_{item['ID']}"):
-                            st.markdown("### Generated Content")
-                            st.markdown(item['Final_Content'])
-            else:
-                st.info("No content history found")
-
-            # Blog source statistics
-            st.subheader("📊 Blog Source Performance")
-            source_stats = sheets_manager.get_blog_source_stats()
-            if source_stats:
-                for source in source_stats[:5]:  # Show top 5
-                    st.write(f"**{source['Domain']}** - Success: {source['Success_Count']}, Last used: {source['Last_Analyzed']}")
-            else:
-                st.info("No blog source statistics available")
-        except Exception as e:
-            st.error(f"❌ Could not load content history: {str(e)}")
+        render_content_history(sheets_manager)
 
     # Footer
     st.markdown("---")
-    st.markdown(
-        """
-        <div style='text-align: center; color: gray; padding: 2rem 0;'>
-        <p>Powered by OpenAI Agents SDK | Built by <a href="https://www.bertramlabs.com" target="_blank" style="color: #2D5DA8; text-decoration: none; font-weight: bold;">Bertram Labs</a></p>
-        <p style='font-size: 0.9rem; margin-top: 0.5rem;'>Professional AI Solutions & Custom Development</p>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
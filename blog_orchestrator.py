@@ -1,424 +1,543 @@
 #!/usr/bin/env python3
 import asyncio
+import functools
+import hashlib
+import queue
+import random
+import re
 import threading
-from typing import Dict, List
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import time
+from collections import OrderedDict
+from typing import Dict, List, TypedDict
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import requests
+from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-from agents import Agent, Runner, WebSearchTool
+from agents import Agent, ModelSettings, Runner, WebSearchTool, set_default_openai_key
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from openai.types.shared import Reasoning
+from request_throttle import agent_rate_limiter
 
 load_dotenv()
 
-class BlogAgentOrchestrator:
-    def __init__(self, model="gpt-5.2"):
-        # Store the model for all agents
-        self.model = model
+# Transient API failures worth retrying; everything else propagates immediately
+TRANSIENT_API_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 2.0
+
+# Upper bound on cached agent responses held in memory per orchestrator
+RESPONSE_CACHE_MAX_ENTRIES = 64
+
+# How long a cached agent response stays valid. The orchestrator itself is
+# long-lived (st.cache_resource shares it across sessions), so without a TTL
+# research and style results would be pinned for the process lifetime.
+RESPONSE_CACHE_TTL_SECONDS = 3600
+
+# Stages that must produce fresh output on every invocation: regenerating
+# topic ideas with unchanged inputs should yield new ideas, not a replay
+UNCACHED_AGENT_NAMES = frozenset({"Topic Idea Generator"})
+
+# Topic parsing never needs more than this much agent output; five topics
+# with all fields fit comfortably in a few KB
+MAX_TOPIC_PARSE_CHARS = 20000
+
+# Topic-idea output parser: one compiled multiline sweep matches either a
+# numbered title line or a field bullet, replacing per-line regex dispatch
+_TOPIC_IDEA_RE = re.compile(
+    r'^[ \t]*#{0,2}\s*\d+\.\s*(?P<title>.+?)\s*$'
+    r'|^[ \t]*-?\s*\*\*(?P<field>Angle|Keywords|Rationale|Content Type)\*\*:\s*(?P<value>.+?)\s*$',
+    re.MULTILINE
+)
+
+
+class BlogPostResults(TypedDict, total=False):
+    """Results returned by create_blog_post; keys fill in as stages complete.
+
+    Like TopicIdea, a plain dict at runtime so the Streamlit app's
+    results.get/[] access keeps working; on failure only the keys produced
+    before the error are present, plus 'error'.
+    """
+    style_guide: str
+    research: str
+    draft: str
+    initial_seo_analysis: str
+    with_links: str
+    final: str
+    seo_analysis: str
+    error: str
+
+
+class TopicIdea(TypedDict, total=False):
+    """One parsed topic idea from the topic generator.
+
+    Stays a plain dict at runtime (Streamlit, SheetsManager, and
+    KeywordResearcher all use dict-style access, and enrichment adds
+    search_volume/competition/trend fields after parsing); the TypedDict
+    just documents the parsed schema.
+    """
+    title: str
+    angle: str
+    keywords: List[str]
+    rationale: str
+    content_type: str
+
+
+def _normalize_blog_source(blog_source: str) -> str:
+    """Normalize a blog source so equivalent spellings share one cache entry.
+
+    Scheme and host are case-insensitive and trailing slashes are cosmetic,
+    so "TechCrunch.com/" and "https://techcrunch.com" build the same style
+    prompt and hit the same cached analysis. Paths keep their case since
+    they may be case-sensitive on the target server.
+    """
+    source = blog_source.strip().rstrip('/')
+    parts = urlsplit(source)
+    if parts.netloc:
+        parts = parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower())
+        return urlunsplit(parts)
+    host, _, rest = source.partition('/')
+    return host.lower() + (f'/{rest}' if rest else '')
+
+
+
+# How many child sitemaps to follow when /sitemap.xml is a sitemap index
+MAX_CHILD_SITEMAPS = 3
+
+def _fetch_sitemap_locs(url: str) -> List[str]:
+    """Fetch a sitemap URL and return its <loc> entries ([] on failure)."""
+    response = requests.get(url, timeout=10)
+    if not response.ok:
+        return []
+    soup = BeautifulSoup(response.text, 'html.parser')
+    return [loc.get_text(strip=True) for loc in soup.find_all('loc')]
+
+def _fetch_internal_link_candidates(reference_blog: str, limit: int = 30) -> List[str]:
+    """Pre-resolve candidate internal URLs with a direct HTTP pass.
+
+    Tries the site's sitemap first (following one level of child sitemaps
+    when /sitemap.xml is a sitemap index, the WordPress/Yoast default) and
+    falls back to same-host links on the homepage. Handing the linker a
+    verified URL list is far cheaper than having it discover every page
+    through web searches; the agent still chooses relevance and placement.
+    Returns [] on any failure so linking falls back to pure search.
+    """
+    try:
+        source = _normalize_blog_source(reference_blog)
+        base = source if source.startswith(('http://', 'https://')) else f'https://{source}'
+        base = base.rstrip('/')
+
+        locs = _fetch_sitemap_locs(f"{base}/sitemap.xml")
+        # Locs ending in .xml are child sitemaps, not pages; never hand
+        # raw sitemap URLs to the linker as link candidates
+        child_sitemaps = [loc for loc in locs if loc.lower().endswith('.xml')]
+        urls = [loc for loc in locs if not loc.lower().endswith('.xml')]
+        if child_sitemaps and len(urls) < limit:
+            for child in child_sitemaps[:MAX_CHILD_SITEMAPS]:
+                urls.extend(loc for loc in _fetch_sitemap_locs(child)
+                            if not loc.lower().endswith('.xml'))
+                if len(urls) >= limit:
+                    break
+
+        if not urls:
+            response = requests.get(base, timeout=10)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.text, 'html.parser')
+            host = urlsplit(base).netloc
+            seen_urls = set()
+            for anchor in soup.find_all('a', href=True):
+                href = urljoin(base, anchor['href']).split('#')[0]
+                if urlsplit(href).netloc == host and href not in seen_urls:
+                    seen_urls.add(href)
+                    urls.append(href)
+
+        return urls[:limit]
+    except Exception:
+        return []
+
+async def _retry_transient(run_once, agent_name, can_retry=None):
+    """Run an agent call, retrying transient API failures with backoff plus jitter.
+
+    can_retry is an optional callable checked before each retry; streamed
+    runs use it to bail out once partial output has already been surfaced.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return await run_once()
+        except TRANSIENT_API_ERRORS as e:
+            if attempt == MAX_ATTEMPTS or (can_retry is not None and not can_retry()):
+                raise
+            delay = BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)) + random.uniform(0, 1)
+            print(f"⚠️ Transient error from '{agent_name}' (attempt {attempt}/{MAX_ATTEMPTS}): {e} - retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+# One WebSearchTool shared by every agent that needs it, so the
+# underlying HTTP client pool is reused across agents and runs
+_WEB_SEARCH_TOOL = WebSearchTool()
+
+# Constructor arguments for each specialist agent; agents are built
+# lazily from these specs on first access (see _get_agent)
+_AGENT_SPECS = {
+    "topic_generator": {
+        "name": "Topic Idea Generator",
+        "instructions": """You are a topic idea generator for blog content.
+
+        Your tasks:
+        1. Analyze the reference blog/website to understand their content strategy
+        2. Identify content gaps and opportunities
+        3. Consider trending topics in their industry
+        4. Generate specific, actionable topic ideas that match their style
+
+        For each topic idea, provide:
+        - **Title**: Compelling headline in the blog's style
+        - **Angle**: Unique perspective or approach
+        - **Keywords**: 3-5 relevant keywords for SEO
+        - **Rationale**: Why this topic would work for their audience
+        - **Content Type**: (Guide, Tutorial, Listicle, Case Study, etc.)
+
+        Generate 8-10 diverse topic ideas that:
+        - Match the blog's content style and tone
+        - Fill gaps in their existing content
+        - Appeal to their target audience
+        - Have SEO potential
+        - Are specific and actionable
+
+        Format each idea clearly with all fields included.
+        """,
+        "web_search": True,
+    },
+    "style_analyzer": {
+        "reasoning_effort": "low",
+        "name": "Blog Style Analyzer",
+        "instructions": """You are a writing style analyzer that can analyze any blog or publication.
+
+        Your tasks:
+        1. Use web search to fetch recent articles from the specified blog/publication: {blog_source}
+        2. Analyze their writing style, tone, voice patterns, and formatting structure
+        3. Extract key stylistic elements including:
+           - Headlines: structure, length, power words, formatting (H1, H2, H3)
+           - Opening paragraphs: hook techniques, information density
+           - Voice: tone characteristics and personality
+           - Technical language: complexity level and jargon usage
+           - Sentence structure: variety, length patterns, rhythm
+           - Common phrases, vocabulary, and expressions
+           - Paragraph organization and flow
+           - Typical post length
+           - FORMATTING PATTERNS: How they structure content with:
+             * Heading hierarchy (H2, H3, H4 usage)
+             * List formatting (bullet points, numbered lists)
+             * Text emphasis (bold, italic usage patterns)
+             * Paragraph lengths and breaks
+             * Call-out boxes, quotes, or special formatting
+             * Code blocks or technical formatting (if applicable)
+        4. Create actionable style guidelines for writers to replicate
+
+        Include a specific FORMATTING GUIDE section with:
+        - Markdown formatting patterns they use
+        - Heading structure preferences
+        - List and emphasis usage patterns
+        - How they break up content visually
+
+        Focus on identifying measurable, replicable patterns.
+        Provide specific examples from the analyzed content.
+        """,
+        "web_search": True,
+    },
+    "content_checker": {
+        "reasoning_effort": "low",
+        "name": "Content Duplication Checker",
+        "instructions": """You are a content duplication specialist that checks for existing content on blogs.
         
-        # Thread pool for agent execution (prevents resource leaks)
-        self._thread_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-")
+        Your tasks:
+        1. Search the specified blog/website for existing content on the given topic
+        2. Identify any articles that cover similar or identical subjects
+        3. Assess the level of duplication risk and content overlap
+        4. Provide recommendations for differentiation if duplicates are found
         
-        # Specialist agents
-        self.agents = {
-            "topic_generator": Agent(
-                name="Topic Idea Generator",
-                model=self.model,
-                instructions="""You are a topic idea generator for blog content.
-
-                Your tasks:
-                1. Analyze the reference blog/website to understand their content strategy
-                2. Identify content gaps and opportunities
-                3. Consider trending topics in their industry
-                4. Generate specific, actionable topic ideas that match their style
-
-                For each topic idea, provide:
-                - **Title**: Compelling headline in the blog's style
-                - **Angle**: Unique perspective or approach
-                - **Keywords**: 3-5 relevant keywords for SEO
-                - **Rationale**: Why this topic would work for their audience
-                - **Content Type**: (Guide, Tutorial, Listicle, Case Study, etc.)
-
-                Generate 8-10 diverse topic ideas that:
-                - Match the blog's content style and tone
-                - Fill gaps in their existing content
-                - Appeal to their target audience
-                - Have SEO potential
-                - Are specific and actionable
-
-                Format each idea clearly with all fields included.
-                """,
-                tools=[WebSearchTool()]
-            ),
-            "style_analyzer": Agent(
-                name="Blog Style Analyzer",
-                model=self.model,
-                instructions="""You are a writing style analyzer that can analyze any blog or publication.
-
-                Your tasks:
-                1. Use web search to fetch recent articles from the specified blog/publication: {blog_source}
-                2. Analyze their writing style, tone, voice patterns, and formatting structure
-                3. Extract key stylistic elements including:
-                   - Headlines: structure, length, power words, formatting (H1, H2, H3)
-                   - Opening paragraphs: hook techniques, information density
-                   - Voice: tone characteristics and personality
-                   - Technical language: complexity level and jargon usage
-                   - Sentence structure: variety, length patterns, rhythm
-                   - Common phrases, vocabulary, and expressions
-                   - Paragraph organization and flow
-                   - Typical post length
-                   - FORMATTING PATTERNS: How they structure content with:
-                     * Heading hierarchy (H2, H3, H4 usage)
-                     * List formatting (bullet points, numbered lists)
-                     * Text emphasis (bold, italic usage patterns)
-                     * Paragraph lengths and breaks
-                     * Call-out boxes, quotes, or special formatting
-                     * Code blocks or technical formatting (if applicable)
-                4. Create actionable style guidelines for writers to replicate
-
-                Include a specific FORMATTING GUIDE section with:
-                - Markdown formatting patterns they use
-                - Heading structure preferences
-                - List and emphasis usage patterns
-                - How they break up content visually
-
-                Focus on identifying measurable, replicable patterns.
-                Provide specific examples from the analyzed content.
-                """,
-                tools=[WebSearchTool()]
-            ),
-            "content_checker": Agent(
-                name="Content Duplication Checker",
-                model=self.model,
-                instructions="""You are a content duplication specialist that checks for existing content on blogs.
-                
-                Your tasks:
-                1. Search the specified blog/website for existing content on the given topic
-                2. Identify any articles that cover similar or identical subjects
-                3. Assess the level of duplication risk and content overlap
-                4. Provide recommendations for differentiation if duplicates are found
-                
-                Analysis criteria:
-                - Look for articles with similar titles, topics, or keywords
-                - Check for content that covers the same main points
-                - Identify seasonal or recurring content patterns
-                - Consider different angles or approaches to the same topic
-                
-                Return analysis in this format:
-                DUPLICATION STATUS: [CLEAR/WARNING/HIGH_RISK]
-                EXISTING CONTENT FOUND: [Number] similar articles
-                SIMILAR ARTICLES:
-                - [Title] - [URL] - [Similarity level: Low/Medium/High]
-                
-                RECOMMENDATIONS:
-                - [Specific suggestions for differentiation]
-                - [Unique angles to explore]
-                - [How to add value beyond existing content]
-                """,
-                tools=[WebSearchTool()]
-            ),
-            "researcher": Agent(
-                name="Research Specialist",
-                model=self.model,
-                instructions="""You are a research specialist for blog content.
-                - Research the given topic thoroughly
-                - Find relevant facts, statistics, and examples
-                - Identify key points and subtopics
-                - Provide structured research data
-                - Include sources when possible
-                """,
-                tools=[WebSearchTool()]
-            ),
-            "writer": Agent(
-                name="Content Writer",
-                model=self.model,
-                instructions="""You are a skilled blog writer who creates content in proper markdown format.
-
-                CRITICAL MARKDOWN FORMATTING REQUIREMENTS:
-                1. Use proper heading hierarchy:
-                   - Main title: # Title
-                   - Major sections: ## Section Title
-                   - Subsections: ### Subsection Title
-
-                2. Format lists correctly:
-                   - Bullet lists: - Item or * Item
-                   - Numbered lists: 1. Item, 2. Item
-                   - Sub-items: Use proper indentation with spaces
-
-                3. Use text emphasis:
-                   - Bold: **important text**
-                   - Italic: *emphasized text*
-
-                4. Structure content properly:
-                   - Blank lines between paragraphs
-                   - Blank lines before and after headings
-                   - Blank lines before and after lists
-
-                5. Follow the style guide's formatting patterns exactly
-
-                EXAMPLE PROPER MARKDOWN STRUCTURE:
-                # Main Title
-
-                Introduction paragraph with **key points** highlighted.
-
-                ## Major Section
-
-                Content paragraph explaining the section.
-
-                ### Subsection
-
-                - First bullet point
-                - Second bullet point with **emphasis**
-                - Third point
-
-                Another paragraph continuing the discussion.
-
-                ## Next Major Section
-
-                1. Numbered item one
-                2. Numbered item two
-                3. Numbered item three
-
-                PUNCTUATION RULES:
-                - NEVER use em dashes (—) anywhere in your writing
-                - Instead of em dashes, use commas, semicolons, colons, parentheses, or separate sentences
-                - Use spaced hyphens ( - ) only when a dash is truly needed for readability
-
-                Your tasks:
-                - Create engaging, well-structured blog posts using PROPER markdown formatting
-                - Use provided research effectively
-                - Write clear introductions and conclusions
-                - Follow the specific formatting patterns from the style guide
-                - Maintain conversational but professional tone
-                - ALWAYS use proper markdown syntax as shown in the example above
-                """
-            ),
-            "internal_linker": Agent(
-                name="Internal Linking Specialist",
-                model=self.model,
-                instructions="""You are an internal linking specialist for blog content.
-
-                Your tasks:
-                1. Analyze the blog post content for internal linking opportunities
-                2. Identify keywords and phrases that could link to other relevant content
-                3. Search for related articles on the same website/domain using WebSearchTool
-                4. ONLY use URLs that you find directly from search results - do not construct or guess URLs
-                5. Verify each link by ensuring it appears in actual search results
-                6. Add strategic internal links using natural anchor text
-
-                CRITICAL Guidelines:
-                - ONLY use URLs that appear in your WebSearchTool search results
-                - DO NOT create, construct, or guess any URLs
-                - Each link must be from an actual page you found via search
-                - Include the full URL exactly as it appears in search results
-                - If you cannot find relevant pages via search, do not add links
-                - Use natural, contextual anchor text (avoid "click here")
-                - Link to genuinely relevant and helpful content
-                - Don't over-link (2-5 internal links per 1000 words is optimal)
-                - Prioritize links that add value to the reader
-                - Use varied anchor text for similar topics
-                - Link to both newer and evergreen content when appropriate
-                - Prioritize collections pages and blog posts over pdps
-
-                Format: Use markdown [anchor text](EXACT_URL_FROM_SEARCH)
-                If unsure about a link, leave it out rather than guessing.
-
-                Return the content with ONLY verified internal links added.
-                """,
-                tools=[WebSearchTool()]
-            ),
-            "editor": Agent(
-                name="Content Editor",
-                model=self.model,
-                instructions="""You are a content editor specializing in markdown-formatted content.
-
-                CRITICAL MARKDOWN EDITING REQUIREMENTS:
-                1. PRESERVE and IMPROVE markdown formatting:
-                   - Keep all heading hierarchy (# ## ###)
-                   - Maintain proper list formatting (- * 1.)
-                   - Preserve text emphasis (**bold**, *italic*)
-                   - Ensure blank lines between sections
-
-                2. FIX any broken markdown:
-                   - Add missing # symbols for headings
-                   - Fix inconsistent list formatting
-                   - Add proper line breaks and spacing
-                   - Ensure proper markdown structure
-
-                3. Content improvements:
-                   - Review content for clarity and flow
-                   - Fix grammar and style issues
-                   - Ensure consistent tone throughout
-                   - Improve readability and engagement
-                   - Suggest structural improvements
-                   - Consider SEO and AI visibility
-                   - Preserve any internal links that have been added
-                   - Replace any em dashes (—) with commas, semicolons, colons, parentheses, or spaced hyphens ( - )
-
-                EXAMPLE OF PROPER MARKDOWN STRUCTURE TO MAINTAIN:
-                # Main Title
-
-                Introduction paragraph.
-
-                ## Major Section
-
-                Content with **important points** highlighted.
-
-                ### Subsection
-
-                - Bullet point one
-                - Bullet point two
-                - Bullet point three
-
-                More content here.
-
-                Your output must be properly formatted markdown that renders correctly in Streamlit.
-                If the input markdown is poorly formatted, FIX IT while preserving the content.
-                """
-            ),
-            "seo_analyzer": Agent(
-                name="SEO Content Analyzer",
-                model=self.model,
-                instructions="""You are an SEO analysis specialist that evaluates blog content.
-                
-                Your tasks:
-                1. Analyze the final blog post for SEO best practices
-                2. Provide specific, actionable recommendations
-                3. Give an overall SEO score and breakdown
-                
-                Evaluation criteria:
-                - Title optimization (length, keywords, compelling)
-                - Heading structure (H1, H2, H3 hierarchy)
-                - Content length and readability
-                - Keyword usage and density
-                - Internal linking effectiveness
-                - Meta description potential
-                - Content structure and scannability
-                - Search intent alignment
-                
-                Return analysis in this format:
-                SEO SCORE: [X/100]
-                
-                STRENGTHS:
-                ✅ [What's working well]
-                
-                IMPROVEMENTS:
-                ⚠️ [Specific actionable recommendations]
-                
-                TITLE ANALYSIS: [Assessment and suggestions]
-                CONTENT STRUCTURE: [Heading hierarchy, readability]
-                KEYWORD USAGE: [Natural integration assessment]
-                INTERNAL LINKS: [Link quality and relevance]
-                
-                QUICK WINS:
-                - [1-3 easy improvements for immediate SEO gains]
-                """
-            )
-        }
-    
-    def _run_agent_safely(self, agent, prompt, timeout_seconds=300):
-        """Execute agent in isolated thread to prevent Streamlit async conflicts."""
+        Analysis criteria:
+        - Look for articles with similar titles, topics, or keywords
+        - Check for content that covers the same main points
+        - Identify seasonal or recurring content patterns
+        - Consider different angles or approaches to the same topic
         
-        def run_in_thread():
-            """Run agent with its own event loop in separate thread."""
-            loop = None
-            try:
-                # Create new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = Runner.run_sync(agent, prompt)
-                return {"success": True, "result": result}
-            except Exception as e:
-                return {"success": False, "error": e}
-            finally:
-                # Ensure event loop is properly cleaned up
-                if loop is not None:
-                    try:
-                        loop.close()
-                    except Exception:
-                        pass  # Ignore cleanup errors
+        Return analysis in this format:
+        DUPLICATION STATUS: [CLEAR/WARNING/HIGH_RISK]
+        EXISTING CONTENT FOUND: [Number] similar articles
+        SIMILAR ARTICLES:
+        - [Title] - [URL] - [Similarity level: Low/Medium/High]
         
-        # Use ThreadPoolExecutor for proper resource management
-        try:
-            future = self._thread_pool.submit(run_in_thread)
-            data = future.result(timeout=timeout_seconds)
-        except FutureTimeoutError:
-            raise TimeoutError(f"Agent '{agent.name}' execution timed out after {timeout_seconds} seconds")
+        RECOMMENDATIONS:
+        - [Specific suggestions for differentiation]
+        - [Unique angles to explore]
+        - [How to add value beyond existing content]
+        """,
+        "web_search": True,
+    },
+    "researcher": {
+        "reasoning_effort": "medium",
+        "name": "Research Specialist",
+        "instructions": """You are a research specialist for blog content.
+        - Research the given topic thoroughly
+        - Find relevant facts, statistics, and examples
+        - Identify key points and subtopics
+        - Provide structured research data
+        - Include sources when possible
+        """,
+        "web_search": True,
+    },
+    "topic_extractor": {
+        "name": "Blog Topic Extractor",
+        "reasoning_effort": "low",
+        "instructions": """You are a blog topic extraction assistant.
+        - Fetch the requested blog or RSS feed
+        - List every post title you can find, one per line
+        - Output titles only, with no numbering, bullets, or commentary
+        """,
+        "web_search": True,
+    },
+    "writer": {
+        "name": "Content Writer",
+        "instructions": """You are a skilled blog writer who creates content in proper markdown format.
+
+        CRITICAL MARKDOWN FORMATTING REQUIREMENTS:
+        1. Use proper heading hierarchy:
+           - Main title: # Title
+           - Major sections: ## Section Title
+           - Subsections: ### Subsection Title
+
+        2. Format lists correctly:
+           - Bullet lists: - Item or * Item
+           - Numbered lists: 1. Item, 2. Item
+           - Sub-items: Use proper indentation with spaces
+
+        3. Use text emphasis:
+           - Bold: **important text**
+           - Italic: *emphasized text*
+
+        4. Structure content properly:
+           - Blank lines between paragraphs
+           - Blank lines before and after headings
+           - Blank lines before and after lists
+
+        5. Follow the style guide's formatting patterns exactly
+
+        EXAMPLE PROPER MARKDOWN STRUCTURE:
+        # Main Title
+
+        Introduction paragraph with **key points** highlighted.
+
+        ## Major Section
+
+        Content paragraph explaining the section.
+
+        ### Subsection
+
+        - First bullet point
+        - Second bullet point with **emphasis**
+        - Third point
+
+        Another paragraph continuing the discussion.
+
+        ## Next Major Section
+
+        1. Numbered item one
+        2. Numbered item two
+        3. Numbered item three
+
+        PUNCTUATION RULES:
+        - NEVER use em dashes (—) anywhere in your writing
+        - Instead of em dashes, use commas, semicolons, colons, parentheses, or separate sentences
+        - Use spaced hyphens ( - ) only when a dash is truly needed for readability
+
+        Your tasks:
+        - Create engaging, well-structured blog posts using PROPER markdown formatting
+        - Use provided research effectively
+        - Write clear introductions and conclusions
+        - Follow the specific formatting patterns from the style guide
+        - Maintain conversational but professional tone
+        - ALWAYS use proper markdown syntax as shown in the example above
+        """
+    },
+    "internal_linker": {
+        "reasoning_effort": "low",
+        "name": "Internal Linking Specialist",
+        "instructions": """You are an internal linking specialist for blog content.
+
+        Your tasks:
+        1. Analyze the blog post content for internal linking opportunities
+        2. Identify keywords and phrases that could link to other relevant content
+        3. Search for related articles on the same website/domain using WebSearchTool
+        4. ONLY use URLs that you find directly from search results - do not construct or guess URLs
+        5. Verify each link by ensuring it appears in actual search results
+        6. Add strategic internal links using natural anchor text
+
+        CRITICAL Guidelines:
+        - ONLY use URLs that appear in your WebSearchTool search results
+        - DO NOT create, construct, or guess any URLs
+        - Each link must be from an actual page you found via search
+        - Include the full URL exactly as it appears in search results
+        - If you cannot find relevant pages via search, do not add links
+        - Use natural, contextual anchor text (avoid "click here")
+        - Link to genuinely relevant and helpful content
+        - Don't over-link (2-5 internal links per 1000 words is optimal)
+        - Prioritize links that add value to the reader
+        - Use varied anchor text for similar topics
+        - Link to both newer and evergreen content when appropriate
+        - Prioritize collections pages and blog posts over pdps
+
+        Format: Use markdown [anchor text](EXACT_URL_FROM_SEARCH)
+        If unsure about a link, leave it out rather than guessing.
+
+        Return the content with ONLY verified internal links added.
+        """,
+        "web_search": True,
+    },
+    "editor": {
+        "reasoning_effort": "medium",
+        "name": "Content Editor",
+        "instructions": """You are a content editor specializing in markdown-formatted content.
+
+        CRITICAL MARKDOWN EDITING REQUIREMENTS:
+        1. PRESERVE and IMPROVE markdown formatting:
+           - Keep all heading hierarchy (# ## ###)
+           - Maintain proper list formatting (- * 1.)
+           - Preserve text emphasis (**bold**, *italic*)
+           - Ensure blank lines between sections
+
+        2. FIX any broken markdown:
+           - Add missing # symbols for headings
+           - Fix inconsistent list formatting
+           - Add proper line breaks and spacing
+           - Ensure proper markdown structure
+
+        3. Content improvements:
+           - Review content for clarity and flow
+           - Fix grammar and style issues
+           - Ensure consistent tone throughout
+           - Improve readability and engagement
+           - Suggest structural improvements
+           - Consider SEO and AI visibility
+           - Preserve any internal links that have been added
+           - Replace any em dashes (—) with commas, semicolons, colons, parentheses, or spaced hyphens ( - )
+
+        EXAMPLE OF PROPER MARKDOWN STRUCTURE TO MAINTAIN:
+        # Main Title
+
+        Introduction paragraph.
+
+        ## Major Section
+
+        Content with **important points** highlighted.
+
+        ### Subsection
+
+        - Bullet point one
+        - Bullet point two
+        - Bullet point three
+
+        More content here.
+
+        Your output must be properly formatted markdown that renders correctly in Streamlit.
+        If the input markdown is poorly formatted, FIX IT while preserving the content.
+        """
+    },
+    "seo_analyzer": {
+        "reasoning_effort": "medium",
+        "name": "SEO Content Analyzer",
+        "instructions": """You are an SEO analysis specialist that evaluates blog content.
         
-        if not data["success"]:
-            print(f"❌ Agent '{agent.name}' execution failed: {data['error']}")
-            raise data["error"]
+        Your tasks:
+        1. Analyze the final blog post for SEO best practices
+        2. Provide specific, actionable recommendations
+        3. Give an overall SEO score and breakdown
         
-        return data["result"]
-    
-    def __del__(self):
-        """Cleanup thread pool on destruction."""
-        if hasattr(self, '_thread_pool'):
-            self._thread_pool.shutdown(wait=True)
+        Evaluation criteria:
+        - Title optimization (length, keywords, compelling)
+        - Heading structure (H1, H2, H3 hierarchy)
+        - Content length and readability
+        - Keyword usage and density
+        - Internal linking effectiveness
+        - Meta description potential
+        - Content structure and scannability
+        - Search intent alignment
+        
+        Return analysis in this format:
+        SEO SCORE: [X/100]
+        
+        STRENGTHS:
+        ✅ [What's working well]
+        
+        IMPROVEMENTS:
+        ⚠️ [Specific actionable recommendations]
+        
+        TITLE ANALYSIS: [Assessment and suggestions]
+        CONTENT STRUCTURE: [Heading hierarchy, readability]
+        KEYWORD USAGE: [Natural integration assessment]
+        INTERNAL LINKS: [Link quality and relevance]
+        
+        QUICK WINS:
+        - [1-3 easy improvements for immediate SEO gains]
+        """
+    }
+}
 
-    def _clean_ai_artifacts(self, text: str) -> str:
-        """Replace common AI writing artifacts like em dashes with natural alternatives."""
-        import re
-        # Replace em dash (—) with spaced hyphen
-        text = text.replace("—", " - ")
-        # Clean up any resulting double spaces
-        text = re.sub(r"  +", " ", text)
-        return text
 
-    def create_blog_post(self, topic: str, reference_blog: str, requirements: str = "", status_callback=None, cached_style_guide: str = None, product_target: str = None, specific_pages: List[str] = None) -> Dict[str, str]:
-        """Main workflow: orchestrates all 7 agents to create style-matched blog post."""
-        results = {}
+@functools.lru_cache(maxsize=None)
+def _get_agent(model: str, key: str) -> Agent:
+    """Build one specialist agent on first use, cached per (model, agent)."""
+    spec = _AGENT_SPECS[key]
+    kwargs = {"name": spec["name"], "model": model, "instructions": spec["instructions"]}
+    if spec.get("web_search"):
+        kwargs["tools"] = [_WEB_SEARCH_TOOL]
+    # Retrieval/formatting stages don't need a deep hidden-reasoning budget;
+    # dialing effort down cuts their time-to-first-token and token spend
+    if spec.get("reasoning_effort"):
+        kwargs["model_settings"] = ModelSettings(reasoning=Reasoning(effort=spec["reasoning_effort"]))
+    return Agent(**kwargs)
 
-        # Add product target to requirements if provided
-        if product_target:
-            product_instruction = f"\n\nIMPORTANT - PRODUCT/PAGE TO PROMOTE:\n{product_target}\n\nNaturally incorporate mentions of this product/page where relevant. Provide value first, then subtly position the product as a helpful solution. Include a link if a URL was provided."
-            requirements = requirements + product_instruction if requirements else product_instruction
 
-        try:
-            # Step 1: Analyze reference style (or use cached)
-            if cached_style_guide:
-                if status_callback:
-                    status_callback("📋 Using cached style guide...", 15)
-                print(f"📋 Using cached style guide for {reference_blog}")
-                style_guide = cached_style_guide
-            else:
-                if status_callback:
-                    status_callback("🎨 Analyzing blog style...", 10)
-                print(f"🎨 Analyzing {reference_blog} style...")
-                style_guide = self.analyze_blog_style(reference_blog, status_callback, specific_pages)
+class _AgentMap:
+    """Read-only mapping that resolves each specialist agent on first access.
 
-            results["style_guide"] = style_guide
-            
-            # Step 2: Research topic (duplication check moved to topic generation phase)
-            if status_callback:
-                status_callback("🔍 Researching topic...", 45)
-            print("🔍 Researching topic...")
-            research_prompt = f"""
-            Research the topic: {topic}
+    Keeps self.agents["writer"]-style lookups working while deferring
+    Agent construction until a stage actually needs one.
+    """
 
-            Requirements: {requirements}
+    def __init__(self, model: str):
+        self._model = model
+
+    def __getitem__(self, key: str) -> Agent:
+        return _get_agent(self._model, key)
+
+    def __iter__(self):
+        return iter(_AGENT_SPECS)
+
+    def __len__(self) -> int:
+        return len(_AGENT_SPECS)
+
+
+# Delimiter the fused editing pass uses to separate the edited post from
+# its SEO assessment in a single response
+SEO_ANALYSIS_DELIMITER = "---SEO ANALYSIS---"
 
+# Runtime prompt templates for the blog pipeline, materialized once at
+# import; create_blog_post fills in the per-run values with str.format
+_RESEARCH_PROMPT = """
             Focus your research on:
             - Recent developments or trends in this area
             - Facts, statistics, and examples
             - Unique insights and perspectives
             - Practical, actionable information
+
+            Research the topic: {topic}
+
+            Requirements: {requirements}
             """
-            research_result = self._run_agent_safely(self.agents["researcher"], research_prompt, timeout_seconds=600)
-            results["research"] = research_result.final_output
-            
-            # Step 4: Write in matching style
-            if status_callback:
-                status_callback("✍️ Writing blog post...", 60)
-            print("✍️ Writing in matched style...")
-            writing_prompt = f"""
-            Write a blog post about: {topic}
 
+_WRITING_PROMPT = """
             STYLE GUIDE TO FOLLOW (including formatting patterns):
             {style_guide}
 
-            RESEARCH DATA:
-            {research_result.final_output}
-
-            REQUIREMENTS: {requirements}
-
             CRITICAL FORMATTING INSTRUCTIONS:
             1. Write the post to closely match the style and voice of {reference_blog}
             2. Use the specific patterns, tone, and techniques identified in the style guide
@@ -429,92 +548,63 @@ class BlogAgentOrchestrator:
             7. Apply bold/italic emphasis in the same way they do
 
             The final output should be properly formatted markdown that matches both the writing style AND visual formatting of {reference_blog}.
+
+            Write a blog post about: {topic}
+
+            RESEARCH DATA:
+            {research}
+
+            REQUIREMENTS: {requirements}
             """
-            
-            writing_result = self._run_agent_safely(self.agents["writer"], writing_prompt, timeout_seconds=600)
-            results["draft"] = self._clean_ai_artifacts(writing_result.final_output)
-            
-            # Step 5: SEO Analysis of draft for optimization recommendations  
-            if status_callback:
-                status_callback("📊 Analyzing draft for SEO optimization...", 65)
-            print("📊 Analyzing draft for SEO recommendations...")
-            initial_seo_prompt = f"""
-            Analyze this blog post draft for SEO optimization opportunities:
-            
-            BLOG POST DRAFT:
-            {writing_result.final_output}
-            
-            TARGET TOPIC: {topic}
-            PUBLICATION STYLE: {reference_blog}
-            
+
+_INITIAL_SEO_PROMPT = """
+            Analyze the blog post draft below for SEO optimization opportunities.
+
             Provide specific, actionable SEO recommendations for:
             1. Heading structure and keyword optimization
             2. Content improvements for better search visibility
-            3. Strategic internal linking opportunities 
+            3. Strategic internal linking opportunities
             4. Meta description suggestions
             5. Readability and structure enhancements
-            
+
             Focus on recommendations that can be implemented in the editing phase.
+
+            TARGET TOPIC: {topic}
+            PUBLICATION STYLE: {reference_blog}
+
+            BLOG POST DRAFT:
+            {draft}
             """
-            
-            try:
-                initial_seo_result = self._run_agent_safely(self.agents["seo_analyzer"], initial_seo_prompt, timeout_seconds=600)
-                results["initial_seo_analysis"] = initial_seo_result.final_output
-                print(f"✅ Initial SEO analysis completed: {len(results['initial_seo_analysis'])} characters")
-            except Exception as e:
-                print(f"❌ Initial SEO analysis failed: {e}")
-                results["initial_seo_analysis"] = f"Initial SEO analysis failed: {str(e)}"
-            
-            # Step 6: Add internal links (with SEO insights)
-            if status_callback:
-                status_callback("🔗 Adding strategic internal links...", 75)
-            print("🔗 Adding internal links with SEO optimization...")
-            linking_prompt = f"""
-            Add strategic internal links to this blog post:
 
-            BLOG POST CONTENT:
-            {writing_result.final_output}
+_LINKING_PROMPT = """
+            Add strategic internal links to the blog post below.
 
             WEBSITE/DOMAIN: {reference_blog}
 
-            SEO RECOMMENDATIONS TO CONSIDER:
-            {results.get("initial_seo_analysis", "No SEO recommendations available")}
-
             CRITICAL Instructions:
-            1. Use WebSearchTool to search for existing content on {reference_blog} that relates to topics in this post
-            2. Use search queries like: "site:{reference_blog} [topic]" to find specific pages
-            3. ONLY use URLs that you find in actual search results - never guess or construct URLs
-            4. For each link you want to add:
-               - Search for the specific topic using site:{reference_blog} operator
-               - Copy the EXACT URL from the search result
-               - Use that exact URL in your markdown link
+            1. Prefer linking to the pre-fetched KNOWN PAGES listed below; those URLs are already verified
+            2. For topics the known pages don't cover, use WebSearchTool with queries like "site:{reference_blog} [topic]"
+            3. ONLY use known-page URLs or URLs found in actual search results - never guess or construct URLs
+            4. For each searched link, copy the EXACT URL from the search result into your markdown link
             5. Add 2-5 relevant internal links using natural anchor text (if found)
-            6. If you cannot find relevant pages via search, it's better to not add a link
-            7. Use markdown format: [anchor text](EXACT_URL_FROM_SEARCH)
-            8. Each link MUST be verified through search - no exceptions
+            6. If you cannot find a relevant page, it's better to not add a link
+            7. Use markdown format: [anchor text](VERIFIED_URL)
+            8. Each link MUST come from the known pages or a search result - no exceptions
 
             Return the blog post with ONLY verified internal links added.
+
+            {known_pages}
+
+            BLOG POST CONTENT:
+            {content}
             """
-            
-            linking_result = self._run_agent_safely(self.agents["internal_linker"], linking_prompt, timeout_seconds=600)
-            results["with_links"] = self._clean_ai_artifacts(linking_result.final_output)
-            
-            # Step 7: Edit with SEO optimization while preserving style and links
-            if status_callback:
-                status_callback("📝 Final editing with SEO optimization...", 85)
-            print("📝 Final editing with SEO optimization...")
-            editing_prompt = f"""
-            Edit this blog post while preserving the {reference_blog} style and internal links:
-            
+
+_EDITING_PROMPT = """
             ORIGINAL STYLE GUIDE:
-            {results["style_guide"]}
-            
-            DRAFT TO EDIT:
-            {linking_result.final_output}
-            
-            SEO RECOMMENDATIONS TO IMPLEMENT:
-            {results.get("initial_seo_analysis", "No SEO recommendations available")}
-            
+            {style_guide}
+
+            Edit the blog post below while preserving the {reference_blog} style and internal links.
+
             Instructions:
             - Improve grammar, flow, and clarity while maintaining the distinctive voice and style patterns
             - PRESERVE all internal links that have been added
@@ -523,72 +613,459 @@ class BlogAgentOrchestrator:
             - Ensure the content flows naturally around the linked text
             - Don't remove or modify any [anchor text](URL) formatting
             - Balance SEO optimization with authentic brand voice
+
+            After the edited post, append a final SEO assessment:
+            - Output a line containing exactly: ---SEO ANALYSIS---
+            - Below that line, assess how well the SEO recommendations were implemented, give an SEO SCORE: [X/100], and list any remaining optimization opportunities
+            - Keep the assessment entirely below the delimiter, never inside the post
+
+            DRAFT TO EDIT:
+            {draft}
+
+            SEO RECOMMENDATIONS TO IMPLEMENT:
+            {seo_recommendations}
+            """
+
+_FINAL_SEO_PROMPT = """
+            Perform a final SEO analysis of the completed blog post below.
+
+            Provide a comprehensive final SEO assessment including:
+            1. How well the original recommendations were implemented
+            2. Current SEO score and performance analysis
+            3. Any remaining optimization opportunities
+            4. Content quality and search visibility assessment
+
+            TARGET TOPIC: {topic}
+            PUBLICATION STYLE: {reference_blog}
+
+            FINAL BLOG POST:
+            {final_post}
+
+            ORIGINAL SEO RECOMMENDATIONS:
+            {seo_recommendations}
             """
+
+
+class BlogAgentOrchestrator:
+    def __init__(self, model="gpt-5.2", api_key=None, light_model="gpt-5-mini"):
+        # Store the models: heavyweight stages use model, mechanical ones
+        # (e.g. topic extraction) use the cheaper light_model
+        self.model = model
+        self.light_model = light_model
+
+        # Hand the key straight to the SDK instead of mutating os.environ;
+        # without an explicit key the SDK falls back to OPENAI_API_KEY.
+        # The key is kept so each run can re-assert it: set_default_openai_key
+        # is process-global, and another orchestrator built with a different
+        # key would otherwise silently redirect this instance's requests.
+        self._api_key = api_key
+        if api_key:
+            set_default_openai_key(api_key)
+        
+        # One persistent event loop in a background thread serves every agent
+        # run. Per-call loops paid setup/teardown on each stage and prevented
+        # the SDK from reusing its HTTP client across calls.
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="agent-loop",
+            daemon=True
+        )
+        self._loop_thread.start()
+
+        # Completed agent responses keyed by (agent name, prompt hash) so
+        # repeated stages (e.g. re-running a pipeline with identical inputs)
+        # skip the API call entirely; entries expire after the TTL and the
+        # oldest are evicted at the cap
+        self._response_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+
+        # Specialist agents, built lazily and shared process-wide per model
+        self.agents = _AgentMap(self.model)
+
+    def _cache_key(self, agent, prompt):
+        """Cache key for one agent call: agent name plus a prompt digest."""
+        return (agent.name, hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+
+    async def _run_agent_coroutine(self, agent, prompt):
+        """Run one agent on the loop, wrapping the outcome in a success/error envelope."""
+        cache_key = self._cache_key(agent, prompt)
+        cacheable = agent.name not in UNCACHED_AGENT_NAMES
+        if cacheable:
+            with self._cache_lock:
+                entry = self._response_cache.get(cache_key)
+                if entry is not None:
+                    cached_result, expires_at = entry
+                    if time.monotonic() < expires_at:
+                        self._response_cache.move_to_end(cache_key)
+                        print(f"♻️ Using cached response for '{agent.name}'")
+                        return {"success": True, "result": cached_result}
+                    del self._response_cache[cache_key]
+
+        try:
+            async def run_once():
+                # Pace outbound requests so parallel stages stay under the
+                # per-minute ceiling instead of triggering 429 backoff
+                await asyncio.sleep(agent_rate_limiter.reserve())
+                if self._api_key:
+                    # Re-assert our key right before the call in case another
+                    # orchestrator has re-pointed the process-global default
+                    set_default_openai_key(self._api_key)
+                return await Runner.run(agent, prompt)
+
+            result = await _retry_transient(run_once, agent.name)
+            if cacheable:
+                with self._cache_lock:
+                    expires_at = time.monotonic() + RESPONSE_CACHE_TTL_SECONDS
+                    self._response_cache[cache_key] = (result, expires_at)
+                    while len(self._response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+                        self._response_cache.popitem(last=False)
+            return {"success": True, "result": result}
+        except Exception as e:
+            return {"success": False, "error": e}
+
+    def _submit_agent(self, agent, prompt):
+        """Schedule agent execution on the persistent loop and return the Future.
+
+        Independent pipeline stages can be submitted together and awaited
+        later with _wait_for_agent so their network time overlaps.
+        """
+        return asyncio.run_coroutine_threadsafe(self._run_agent_coroutine(agent, prompt), self._loop)
+
+    def _gather_agents(self, jobs, timeout_seconds=600):
+        """Run several named (agent, prompt) jobs concurrently via asyncio.gather.
+
+        jobs maps a result key to an (agent, prompt) pair. Returns the same
+        success/error envelopes the single-agent path produces, keyed the
+        same way, so callers decide per stage whether a failure is fatal.
+        """
+        async def run_all():
+            outcomes = await asyncio.gather(
+                *(self._run_agent_coroutine(agent, prompt) for agent, prompt in jobs.values())
+            )
+            return dict(zip(jobs, outcomes))
+
+        future = asyncio.run_coroutine_threadsafe(run_all(), self._loop)
+        try:
+            return future.result(timeout=timeout_seconds)
+        except FutureTimeoutError:
+            names = ", ".join(agent.name for agent, _ in jobs.values())
+            raise TimeoutError(f"Agents [{names}] execution timed out after {timeout_seconds} seconds")
+
+    def _wait_for_agent(self, agent, future, timeout_seconds=300):
+        """Wait for a submitted agent Future and unwrap its result."""
+        try:
+            data = future.result(timeout=timeout_seconds)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Agent '{agent.name}' execution timed out after {timeout_seconds} seconds")
+
+        if not data["success"]:
+            print(f"❌ Agent '{agent.name}' execution failed: {data['error']}")
+            raise data["error"]
+
+        return data["result"]
+
+    def _run_agent_safely(self, agent, prompt, timeout_seconds=300):
+        """Execute agent in isolated thread to prevent Streamlit async conflicts."""
+        future = self._submit_agent(agent, prompt)
+        return self._wait_for_agent(agent, future, timeout_seconds)
+
+    def _run_agent_streamed(self, agent, prompt, on_progress, timeout_seconds=300):
+        """Execute agent while surfacing partial output as it is generated.
+
+        The worker thread pushes text deltas onto a queue; this (caller)
+        thread drains the queue and invokes on_progress with the accumulated
+        text, so Streamlit UI updates stay on the script thread.
+        """
+        delta_queue = queue.Queue()
+
+        # Once deltas have been surfaced a retry would duplicate text,
+        # so retries are only allowed before the first delta
+        emitted = threading.Event()
+
+        async def run_on_loop():
+            try:
+                async def consume_stream():
+                    await asyncio.sleep(agent_rate_limiter.reserve())
+                    if self._api_key:
+                        # Same global-key re-assertion as the non-streamed path
+                        set_default_openai_key(self._api_key)
+                    streamed = Runner.run_streamed(agent, prompt)
+                    async for event in streamed.stream_events():
+                        if event.type == "raw_response_event":
+                            data = event.data
+                            if getattr(data, "type", "") == "response.output_text.delta":
+                                delta_queue.put(data.delta)
+                                emitted.set()
+                    return streamed
+
+                result = await _retry_transient(
+                    consume_stream,
+                    agent.name,
+                    can_retry=lambda: not emitted.is_set()
+                )
+                return {"success": True, "result": result}
+            except Exception as e:
+                return {"success": False, "error": e}
+
+        future = asyncio.run_coroutine_threadsafe(run_on_loop(), self._loop)
+        deadline = time.monotonic() + timeout_seconds
+        accumulated = []
+
+        while not future.done():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Agent '{agent.name}' execution timed out after {timeout_seconds} seconds")
+            try:
+                accumulated.append(delta_queue.get(timeout=0.25))
+            except queue.Empty:
+                continue
+            # Drain whatever else arrived before repainting
+            while True:
+                try:
+                    accumulated.append(delta_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if on_progress:
+                try:
+                    on_progress(''.join(accumulated))
+                except Exception:
+                    pass  # UI updates must never kill the pipeline
+
+        return self._wait_for_agent(agent, future, timeout_seconds=max(1, int(deadline - time.monotonic())))
+    
+    def __del__(self):
+        """Stop the background event loop on destruction."""
+        loop = getattr(self, '_loop', None)
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+
+    def _clean_ai_artifacts(self, text: str) -> str:
+        """Replace common AI writing artifacts like em dashes with natural alternatives."""
+        # Replace em dash (—) with spaced hyphen
+        text = text.replace("—", " - ")
+        # Clean up any resulting double spaces
+        text = re.sub(r"  +", " ", text)
+        return text
+
+    def _safe_status(self, status_callback, message: str, percent: int):
+        """Report progress without letting UI-side errors stall the pipeline."""
+        if status_callback is None:
+            return
+        try:
+            status_callback(message, percent)
+        except Exception:
+            pass  # progress updates must never kill or block a run
+
+    def _condense_style_guide(self, style_guide: str, limit: int = 2000) -> str:
+        """Condense a style guide to at most limit characters of core patterns.
+
+        Keeps the guide's opening (voice and tone) and, when the FORMATTING
+        GUIDE section the style analyzer produces would fall past the cap,
+        splices it in at half the budget. Deterministic per guide, so the
+        condensed block stays a stable prompt prefix for provider caching.
+        """
+        if len(style_guide) <= limit:
+            return style_guide
+
+        marker = style_guide.find('FORMATTING GUIDE')
+        if marker == -1 or marker < limit // 2:
+            condensed = style_guide[:limit]
+        else:
+            head = limit // 2
+            condensed = style_guide[:head] + "\n...\n" + style_guide[marker:marker + (limit - head)]
+        return condensed + "\n\n[Style guide condensed to its core patterns]"
+
+    def create_blog_post(self, topic: str, reference_blog: str, requirements: str = "", status_callback=None, cached_style_guide: str = None, product_target: str = None, specific_pages: List[str] = None, stream_callback=None) -> BlogPostResults:
+        """Main workflow: orchestrates all 7 agents to create style-matched blog post."""
+        results: BlogPostResults = {}
+
+        # Collapse stray whitespace so trivially restated topics build the
+        # same research prompt and reuse its cached result
+        topic = ' '.join(topic.split())
+
+        # Add product target to requirements if provided
+        if product_target:
+            product_instruction = f"\n\nIMPORTANT - PRODUCT/PAGE TO PROMOTE:\n{product_target}\n\nNaturally incorporate mentions of this product/page where relevant. Provide value first, then subtly position the product as a helpful solution. Include a link if a URL was provided."
+            requirements = requirements + product_instruction if requirements else product_instruction
+
+        try:
+            # Steps 1 and 2: style analysis and topic research only depend on
+            # the inputs, so both agents are gathered concurrently on the
+            # shared loop (duplication check moved to topic generation phase)
+            research_prompt = _RESEARCH_PROMPT.format(topic=topic, requirements=requirements)
+
+            if cached_style_guide:
+                self._safe_status(status_callback, "📋 Using cached style guide...", 15)
+                print(f"📋 Using cached style guide for {reference_blog}")
+                style_guide = cached_style_guide
+
+                self._safe_status(status_callback, "🔍 Researching topic...", 45)
+                print("🔍 Researching topic...")
+                research_result = self._run_agent_safely(self.agents["researcher"], research_prompt, timeout_seconds=600)
+            else:
+                self._safe_status(status_callback, "🎨 Analyzing blog style and researching topic...", 10)
+                print(f"🎨 Analyzing {reference_blog} style...")
+                print("🔍 Researching topic...")
+                outcomes = self._gather_agents({
+                    "style": (self.agents["style_analyzer"], self._build_style_prompt(reference_blog, specific_pages)),
+                    "research": (self.agents["researcher"], research_prompt),
+                }, timeout_seconds=600)
+
+                # Style failure degrades to a placeholder (matching
+                # analyze_blog_style); research failure aborts the run
+                if outcomes["style"]["success"]:
+                    style_guide = outcomes["style"]["result"].final_output
+                    print("✅ Style analysis completed")
+                else:
+                    print(f"❌ Style analysis failed: {outcomes['style']['error']}")
+                    style_guide = f"Style analysis failed: {outcomes['style']['error']}"
+
+                if not outcomes["research"]["success"]:
+                    raise outcomes["research"]["error"]
+                research_result = outcomes["research"]["result"]
+
+            results["style_guide"] = style_guide
+            results["research"] = research_result.final_output
             
-            editing_result = self._run_agent_safely(self.agents["editor"], editing_prompt, timeout_seconds=600)
-            results["final"] = self._clean_ai_artifacts(editing_result.final_output)
+            # Step 4: Write in matching style
+            self._safe_status(status_callback, "✍️ Writing blog post...", 60)
+            print("✍️ Writing in matched style...")
+            # Stable content (style guide, formatting rules) leads the prompt
+            # and volatile content (topic, research, requirements) trails it,
+            # so provider-side prompt caching can reuse the shared prefix
+            # across posts written against the same reference blog
+            writing_prompt = _WRITING_PROMPT.format(
+                style_guide=self._condense_style_guide(style_guide, limit=8000),
+                reference_blog=reference_blog,
+                topic=topic,
+                research=research_result.final_output,
+                requirements=requirements
+            )
             
-            # Step 8: Final SEO Analysis and Performance Assessment
-            if status_callback:
-                status_callback("📊 Final SEO performance analysis...", 95)
-            print("📊 Final SEO performance assessment...")
-            final_seo_prompt = f"""
-            Perform a final SEO analysis of this completed blog post:
+            if stream_callback:
+                writing_result = self._run_agent_streamed(self.agents["writer"], writing_prompt, stream_callback, timeout_seconds=600)
+            else:
+                writing_result = self._run_agent_safely(self.agents["writer"], writing_prompt, timeout_seconds=600)
+            results["draft"] = self._clean_ai_artifacts(writing_result.final_output)
             
-            FINAL BLOG POST:
-            {editing_result.final_output}
+            # Steps 5 and 6 run together: the SEO analysis and the internal
+            # linker both work from the draft, so both agents are gathered
+            # concurrently on the shared loop. The editor (step 7) merges
+            # their outputs afterwards.
+            self._safe_status(status_callback, "📊 Analyzing SEO and adding internal links...", 65)
+            print("📊 Analyzing draft for SEO recommendations...")
+            initial_seo_prompt = _INITIAL_SEO_PROMPT.format(topic=topic, reference_blog=reference_blog, draft=writing_result.final_output)
             
-            ORIGINAL SEO RECOMMENDATIONS:
-            {results.get("initial_seo_analysis", "No initial SEO recommendations were available")}
+            print("🔗 Adding internal links...")
+            link_candidates = _fetch_internal_link_candidates(reference_blog)
+            if link_candidates:
+                print(f"🔗 Pre-fetched {len(link_candidates)} internal link candidates")
+                known_pages = "KNOWN PAGES ON THIS SITE (pre-fetched and verified):\n" + "\n".join(f"- {url}" for url in link_candidates)
+            else:
+                known_pages = "No pre-fetched pages available; rely on site: searches."
+            linking_prompt = _LINKING_PROMPT.format(reference_blog=reference_blog, known_pages=known_pages, content=writing_result.final_output)
             
-            TARGET TOPIC: {topic}
-            PUBLICATION STYLE: {reference_blog}
+            outcomes = self._gather_agents({
+                "seo": (self.agents["seo_analyzer"], initial_seo_prompt),
+                "linking": (self.agents["internal_linker"], linking_prompt),
+            }, timeout_seconds=600)
+
+            # SEO failure degrades to a placeholder the editor can ignore;
+            # a linking failure propagates and aborts the run, as before
+            if outcomes["seo"]["success"]:
+                results["initial_seo_analysis"] = outcomes["seo"]["result"].final_output
+                print(f"✅ Initial SEO analysis completed: {len(results['initial_seo_analysis'])} characters")
+            else:
+                print(f"❌ Initial SEO analysis failed: {outcomes['seo']['error']}")
+                results["initial_seo_analysis"] = f"Initial SEO analysis failed: {outcomes['seo']['error']}"
+
+            self._safe_status(status_callback, "🔗 Adding strategic internal links...", 75)
+            if not outcomes["linking"]["success"]:
+                raise outcomes["linking"]["error"]
+            linking_result = outcomes["linking"]["result"]
+            results["with_links"] = self._clean_ai_artifacts(linking_result.final_output)
             
-            Provide a comprehensive final SEO assessment including:
-            1. How well the original recommendations were implemented
-            2. Current SEO score and performance analysis  
-            3. Any remaining optimization opportunities
-            4. Content quality and search visibility assessment
-            """
+            # Steps 7 and 8 fused: the editor implements the SEO
+            # recommendations and assesses the result in the same response,
+            # saving a full re-read of the post by a second agent
+            self._safe_status(status_callback, "📝 Final editing with SEO optimization...", 85)
+            print("📝 Final editing with SEO optimization...")
+            # Same prefix ordering as the writing prompt: the style guide and
+            # static editing rules lead, the per-post draft and SEO notes trail
+            editing_prompt = _EDITING_PROMPT.format(
+                style_guide=self._condense_style_guide(results["style_guide"]),
+                reference_blog=reference_blog,
+                draft=linking_result.final_output,
+                seo_recommendations=results.get("initial_seo_analysis", "No SEO recommendations available")
+            )
             
-            final_seo_result = self._run_agent_safely(self.agents["seo_analyzer"], final_seo_prompt, timeout_seconds=600)
-            results["seo_analysis"] = final_seo_result.final_output
+            if stream_callback:
+                def preview_post_only(partial_text):
+                    # The fused response trails into the SEO assessment; keep
+                    # the delimiter and everything after it out of the
+                    # user-facing live preview
+                    stream_callback(partial_text.split(SEO_ANALYSIS_DELIMITER, 1)[0])
+
+                editing_result = self._run_agent_streamed(self.agents["editor"], editing_prompt, preview_post_only, timeout_seconds=600)
+            else:
+                editing_result = self._run_agent_safely(self.agents["editor"], editing_prompt, timeout_seconds=600)
+
+            edited_output = editing_result.final_output
+            if SEO_ANALYSIS_DELIMITER in edited_output:
+                final_post, seo_analysis = edited_output.split(SEO_ANALYSIS_DELIMITER, 1)
+                results["final"] = self._clean_ai_artifacts(final_post.strip())
+                results["seo_analysis"] = seo_analysis.strip()
+            else:
+                # Delimiter missing: keep the whole output as the post and
+                # fall back to a separate assessment call
+                results["final"] = self._clean_ai_artifacts(edited_output)
+                self._safe_status(status_callback, "📊 Final SEO performance analysis...", 95)
+                print("📊 Final SEO performance assessment...")
+                final_seo_prompt = _FINAL_SEO_PROMPT.format(
+                    topic=topic,
+                    reference_blog=reference_blog,
+                    final_post=edited_output,
+                    seo_recommendations=results.get("initial_seo_analysis", "No initial SEO recommendations were available")
+                )
+                final_seo_result = self._run_agent_safely(self.agents["seo_analyzer"], final_seo_prompt, timeout_seconds=600)
+                results["seo_analysis"] = final_seo_result.final_output
             
-            if status_callback:
-                status_callback("✅ Blog post completed with SEO analysis!", 100)
+            self._safe_status(status_callback, "✅ Blog post completed with SEO analysis!", 100)
             
             return results
             
         except Exception as e:
             print(f"❌ Error creating blog post: {e}")
-            if status_callback:
-                status_callback(f"❌ Error: {str(e)}", 0)
+            self._safe_status(status_callback, f"❌ Error: {str(e)}", 0)
             results["error"] = str(e)
             return results
     
     def parallel_research(self, topic: str, research_areas: List[str]) -> Dict[str, str]:
         """Unused function for parallel research - not integrated in main workflow."""
-        from concurrent.futures import ThreadPoolExecutor
-        
-        def research_area(area: str) -> str:
-            prompt = f"Research specifically about {area} in relation to {topic}"
-            result = Runner.run_sync(self.agents["researcher"], prompt)
-            return result.final_output
-        
         print(f"🔍 Conducting parallel research on {len(research_areas)} areas...")
-        
-        with ThreadPoolExecutor() as executor:
-            futures = {area: executor.submit(research_area, area) for area in research_areas}
-            results = {area: future.result() for area, future in futures.items()}
-        
+
+        # Fan out on the persistent loop instead of spinning up worker
+        # threads; the calls are pure I/O so asyncio.gather covers them
+        outcomes = self._gather_agents({
+            area: (self.agents["researcher"], f"Research specifically about {area} in relation to {topic}")
+            for area in research_areas
+        })
+
+        results = {}
+        for area, outcome in outcomes.items():
+            if not outcome["success"]:
+                raise outcome["error"]
+            results[area] = outcome["result"].final_output
+
         print("✅ Parallel research completed")
         return results
     
-    def analyze_blog_style(self, blog_source: str, status_callback=None, specific_pages: List[str] = None) -> str:
-        """Uses style_analyzer agent to extract writing patterns from reference blog."""
-        if status_callback:
-            status_callback(f"🎨 Fetching articles from {blog_source}...", 15)
-        print(f"🎨 Analyzing writing style of {blog_source}...")
+    def _build_style_prompt(self, blog_source: str, specific_pages: List[str] = None) -> str:
+        """Build the style-analysis prompt shared by the standalone and pipelined paths."""
+        # Normalize the source so cosmetic spelling differences produce
+        # byte-identical prompts and reuse the same cached analysis
+        blog_source = _normalize_blog_source(blog_source)
 
         # Build specific pages context
         specific_pages_context = ""
@@ -601,7 +1078,7 @@ class BlogAgentOrchestrator:
             These pages should be the PRIMARY examples in your style guide.
             """
 
-        style_prompt = f"""
+        return f"""
         Analyze the writing style of {blog_source}.
         {specific_pages_context}
 
@@ -614,10 +1091,16 @@ class BlogAgentOrchestrator:
 
         Focus on recent articles to capture current writing style.
         """
-        
+
+    def analyze_blog_style(self, blog_source: str, status_callback=None, specific_pages: List[str] = None) -> str:
+        """Uses style_analyzer agent to extract writing patterns from reference blog."""
+        self._safe_status(status_callback, f"🎨 Fetching articles from {blog_source}...", 15)
+        print(f"🎨 Analyzing writing style of {blog_source}...")
+
+        style_prompt = self._build_style_prompt(blog_source, specific_pages)
+
         try:
-            if status_callback:
-                status_callback("🔍 Analyzing writing patterns...", 25)
+            self._safe_status(status_callback, "🔍 Analyzing writing patterns...", 25)
             result = self._run_agent_safely(self.agents["style_analyzer"], style_prompt, timeout_seconds=600)
             print("✅ Style analysis completed")
             return result.final_output
@@ -625,11 +1108,11 @@ class BlogAgentOrchestrator:
             print(f"❌ Style analysis failed: {e}")
             return f"Style analysis failed: {e}"
     
-    def create_style_matched_post(self, topic: str, reference_blog: str, requirements: str = "") -> Dict[str, str]:
+    def create_style_matched_post(self, topic: str, reference_blog: str, requirements: str = "") -> BlogPostResults:
         """Legacy function name - calls create_blog_post internally."""
         return self.create_blog_post(topic, reference_blog, requirements)
 
-    def generate_topic_ideas(self, reference_blog: str, preferences: str = "", status_callback=None, trending_keywords: List[str] = None, product_target: str = None, existing_topics: List[str] = None) -> List[Dict]:
+    def generate_topic_ideas(self, reference_blog: str, preferences: str = "", status_callback=None, trending_keywords: List[str] = None, product_target: str = None, existing_topics: List[str] = None) -> List[TopicIdea]:
         """
         Generate topic ideas for a blog based on their content strategy and trending keywords
 
@@ -642,57 +1125,68 @@ class BlogAgentOrchestrator:
             existing_topics: Optional list of existing blog post titles to avoid duplication
 
         Returns:
-            List of topic idea dicts
+            List of TopicIdea dicts
         """
         try:
-            if status_callback:
-                status_callback("💡 Analyzing blog and generating topic ideas...", 50)
+            self._safe_status(status_callback, "💡 Analyzing blog and generating topic ideas...", 50)
 
             print(f"💡 Generating topic ideas for {reference_blog}...")
 
-            # Build keyword context if provided
-            keyword_context = ""
+            # Assemble the prompt as a list of sections joined once at the
+            # end; the optional contexts can push the prompt past 10KB and
+            # repeated string concatenation reallocates on every +
+            prompt_parts = [f"""
+            Generate 5 topic ideas for the blog: {reference_blog}
+
+            Additional preferences:
+            {preferences if preferences else "No specific preferences"}
+            """]
+
+            # Keyword context if provided
             if trending_keywords:
-                keyword_context = f"""
+                prompt_parts.append(f"""
 
                 TRENDING KEYWORDS TO INCORPORATE:
                 These keywords are currently trending or have high search volume. Try to build topics around these:
                 {', '.join(trending_keywords[:10])}
-                """
+                """)
 
-            # Build product context if provided
-            product_context = ""
+            # Product context if provided
             if product_target:
-                product_context = f"""
+                prompt_parts.append(f"""
 
                 PRODUCT/SERVICE TO PROMOTE:
                 {product_target}
 
                 IMPORTANT: Create topics that naturally lead to this product as a solution. The content should provide value first, then subtly position the product as helpful. Avoid being overly promotional.
-                """
+                """)
 
-            # Build existing topics context if provided
-            duplication_context = ""
+            # Existing topics context if provided
             if existing_topics and len(existing_topics) > 0:
+                # Dedupe case-insensitively (RSS feeds and Sheets caches often
+                # repeat titles) so the 50-topic sample isn't wasted on copies
+                seen_titles = set()
+                unique_topics = []
+                for title in existing_topics:
+                    key = title.lower().strip()
+                    if key and key not in seen_titles:
+                        seen_titles.add(key)
+                        unique_topics.append(title.strip())
+
                 # Show first 50 topics to avoid token limit
-                topics_sample = existing_topics[:50]
-                duplication_context = f"""
+                topics_sample = unique_topics[:50]
+                remaining = len(unique_topics) - len(topics_sample)
+                titles_block = '\n                - '.join(topics_sample)
+                prompt_parts.append(f"""
 
                 EXISTING BLOG POSTS TO AVOID DUPLICATING:
-                {chr(10).join(f"- {title}" for title in topics_sample)}
-                {f"(and {len(existing_topics) - 50} more...)" if len(existing_topics) > 50 else ""}
+                - {titles_block}
+                {f"(and {remaining} more...)" if remaining > 0 else ""}
 
                 CRITICAL: Do NOT suggest topics that are too similar to these existing posts. Generate completely new angles and subjects.
-                """
-
-            prompt = f"""
-            Generate 5 topic ideas for the blog: {reference_blog}
+                """)
 
-            Additional preferences:
-            {preferences if preferences else "No specific preferences"}
-            {keyword_context}
-            {product_context}
-            {duplication_context}
+            prompt_parts.append(f"""
 
             Instructions:
             1. Quickly search {reference_blog} for 3-5 recent articles to understand their style
@@ -709,46 +1203,49 @@ class BlogAgentOrchestrator:
             - **Content Type**: Guide/Tutorial/Listicle/Case Study
 
             Generate all 5 topics now. Be concise but specific.
-            """
+            """)
+
+            prompt = ''.join(prompt_parts)
 
             result = self._run_agent_safely(self.agents["topic_generator"], prompt, timeout_seconds=600)  # 10 minutes
 
-            if status_callback:
-                status_callback("✅ Topic ideas generated!", 100)
+            self._safe_status(status_callback, "✅ Topic ideas generated!", 100)
 
-            # Parse the result into structured topics
-            topics = self._parse_topic_ideas(result.final_output)
+            # Parse the result into structured topics (prompt asks for 5)
+            topics = self._parse_topic_ideas(result.final_output, max_topics=5)
 
             return topics
 
         except Exception as e:
             print(f"❌ Error generating topics: {e}")
-            if status_callback:
-                status_callback(f"❌ Error: {str(e)}", 0)
+            self._safe_status(status_callback, f"❌ Error: {str(e)}", 0)
             return []
 
-    def _parse_topic_ideas(self, raw_output: str) -> List[Dict]:
-        """Parse the agent's topic ideas output into structured format"""
-        import re
+    def _parse_topic_ideas(self, raw_output: str, max_topics: int = None) -> List[TopicIdea]:
+        """Parse the agent's topic ideas output into structured format.
 
+        max_topics, when given, stops the scan as soon as that many topics
+        are complete; agent outputs often trail off into commentary that
+        there is no point parsing.
+        """
         topics = []
-        lines = raw_output.split('\n')
-
         current_topic = None
 
-        for line in lines:
-            line = line.strip()
-
+        # Cap the scanned region; runaway outputs past this point are
+        # commentary, not topics, and the regex sweep shouldn't pay for them
+        for match in _TOPIC_IDEA_RE.finditer(raw_output, 0, min(len(raw_output), MAX_TOPIC_PARSE_CHARS)):
             # Match topic title (e.g., "## 1. Title Here" or "1. Title Here")
-            title_match = re.match(r'^#{0,2}\s*\d+\.\s*(.+)$', line)
-            if title_match:
-                # Save previous topic
+            title = match.group('title')
+            if title is not None:
+                # Save previous topic and start a new one
                 if current_topic and current_topic.get('title'):
                     topics.append(current_topic)
+                    if max_topics is not None and len(topics) >= max_topics:
+                        current_topic = None
+                        break
 
-                # Start new topic
                 current_topic = {
-                    'title': title_match.group(1).strip(),
+                    'title': title,
                     'angle': '',
                     'keywords': [],
                     'rationale': '',
@@ -759,22 +1256,19 @@ class BlogAgentOrchestrator:
             if not current_topic:
                 continue
 
-            # Extract fields
-            if line.startswith('- **Angle**:') or line.startswith('**Angle**:'):
-                current_topic['angle'] = line.split(':', 1)[1].strip()
-            elif line.startswith('- **Keywords**:') or line.startswith('**Keywords**:'):
-                keywords_str = line.split(':', 1)[1].strip()
-                current_topic['keywords'] = [kw.strip() for kw in keywords_str.split(',')]
-            elif line.startswith('- **Rationale**:') or line.startswith('**Rationale**:'):
-                current_topic['rationale'] = line.split(':', 1)[1].strip()
-            elif line.startswith('- **Content Type**:') or line.startswith('**Content Type**:'):
-                current_topic['content_type'] = line.split(':', 1)[1].strip()
+            # Field bullet (e.g., "- **Keywords**: a, b, c")
+            field = match.group('field')
+            value = match.group('value')
+            if field == 'Keywords':
+                current_topic['keywords'] = [kw.strip() for kw in value.split(',')]
+            else:
+                current_topic[field.lower().replace(' ', '_')] = value
 
         # Don't forget last topic
         if current_topic and current_topic.get('title'):
             topics.append(current_topic)
 
-        return topics
+        return topics[:max_topics] if max_topics is not None else topics
 
     def extract_blog_topics(self, blog_url: str) -> List[str]:
         """
@@ -790,7 +1284,7 @@ class BlogAgentOrchestrator:
             print(f"📰 Extracting topics from {blog_url}...")
 
             prompt = f"""
-            Extract all available blog post titles from: {blog_url}
+            Extract all available blog post titles from the URL given below.
 
             Instructions:
             1. Fetch the content from this URL
@@ -802,10 +1296,14 @@ class BlogAgentOrchestrator:
             Title 1
             Title 2
             Title 3
+
+            URL: {blog_url}
             """
 
+            # Title extraction is mechanical fetch-and-list work, so it
+            # runs on the light model rather than the main one
             result = self._run_agent_safely(
-                self.agents["researcher"],  # Use researcher agent with WebSearchTool
+                _get_agent(self.light_model, "topic_extractor"),
                 prompt,
                 timeout_seconds=120
             )
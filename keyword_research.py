@@ -9,10 +9,13 @@ import os
 os.environ['GRPC_VERBOSITY'] = 'ERROR'
 os.environ['GLOG_minloglevel'] = '2'
 
-import streamlit as st
+import json
+import tempfile
+import time
 from typing import List, Dict, Optional
+
+import streamlit as st
 from pytrends.request import TrendReq
-import time
 
 
 class KeywordResearcher:
@@ -49,9 +52,6 @@ class KeywordResearcher:
         """Initialize Google Ads API client with service account"""
         try:
             from google.ads.googleads.client import GoogleAdsClient
-            import json
-            import tempfile
-            import os
 
             # Parse service account JSON
             service_account_info = json.loads(self.google_ads_config['service_account_json'])
@@ -99,8 +99,6 @@ class KeywordResearcher:
             return []
 
         try:
-            from google.ads.googleads.client import GoogleAdsClient
-
             keyword_plan_idea_service = self.google_ads_client.get_service(
                 "KeywordPlanIdeaService"
             )
@@ -238,6 +236,11 @@ class KeywordResearcher:
         Returns:
             Topics enriched with search volume, competition, and trend data
         """
+        # Collect the unique keyword set across all topics so trend and ads
+        # lookups can be batched instead of issued once per topic (each
+        # Trends request carries a multi-second rate-limit delay)
+        all_keywords = []
+        seen_keywords = set()
         for topic in topics:
             keywords = topic.get('keywords', [])
 
@@ -246,18 +249,50 @@ class KeywordResearcher:
                 keywords = [word.lower() for word in topic['title'].split() if len(word) > 3][:3]
                 topic['keywords'] = keywords
 
-            # Get trend data (always available)
-            trend_scores = self.get_trend_data(keywords)
-            topic['trend_score'] = max(trend_scores.values()) if trend_scores else 0
+            for keyword in keywords:
+                if keyword.lower() not in seen_keywords:
+                    seen_keywords.add(keyword.lower())
+                    all_keywords.append(keyword)
+
+        # One batched Trends pass (max 5 keywords per request), keyed by
+        # lowercase keyword since the dedup above keeps first-seen casing
+        trend_scores = {}
+        for i in range(0, len(all_keywords), 5):
+            batch_scores = self.get_trend_data(all_keywords[i:i + 5])
+            trend_scores.update({kw.lower(): score for kw, score in batch_scores.items()})
+
+        # Batched Google Ads lookups (if configured); GenerateKeywordIdeas
+        # caps each request at 20 seed keywords, and one over-limit request
+        # would fail outright and leave every topic without volume data
+        keyword_ideas = []
+        if self.google_ads_client and all_keywords:
+            for i in range(0, len(all_keywords), 20):
+                keyword_ideas.extend(self.get_keyword_ideas(all_keywords[i:i + 20]))
+
+        for topic in topics:
+            keywords = topic.get('keywords', [])
+
+            # Trend data (always available)
+            topic_scores = [trend_scores.get(kw.lower(), 0) for kw in keywords]
+            topic['trend_score'] = max(topic_scores) if topic_scores else 0
             topic['trend_status'] = self._get_trend_status(topic['trend_score'])
 
-            # Get keyword data from Google Ads if available
+            # Keyword data from Google Ads if available
             if self.google_ads_client:
-                keyword_ideas = self.get_keyword_ideas(keywords)
-
-                if keyword_ideas:
+                # Match on the exact keyword or whole-token containment;
+                # plain substring tests let a short keyword like "ai" claim
+                # volume data from unrelated ideas (e.g. "email campaigns")
+                keyword_set = [kw.lower() for kw in keywords]
+                topic_ideas = [
+                    idea for idea in keyword_ideas
+                    if any(kw == idea['keyword'].lower()
+                           or set(kw.split()).issubset(idea['keyword'].lower().split())
+                           for kw in keyword_set)
+                ]
+
+                if topic_ideas:
                     # Use the best keyword data
-                    best_keyword = max(keyword_ideas, key=lambda x: x['avg_monthly_searches'])
+                    best_keyword = max(topic_ideas, key=lambda x: x['avg_monthly_searches'])
                     topic['search_volume'] = best_keyword['avg_monthly_searches']
                     topic['competition'] = best_keyword['competition']
                     topic['competition_index'] = best_keyword['competition_index']
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Request pacing for BlogAgents
+Smooths outbound OpenAI agent calls under a requests-per-minute ceiling so
+bursts (parallel pipeline stages, batch topic runs) don't trip 429 retries
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+# Requests-per-minute ceiling for agent runs. Kept deliberately below typical
+# account limits; override with BLOG_AGENTS_RPM for higher-tier accounts.
+DEFAULT_REQUESTS_PER_MINUTE = int(os.environ.get('BLOG_AGENTS_RPM', '60'))
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter for outbound requests.
+
+    Each agent run reserves a slot before issuing its request. When the
+    window is full, callers wait just long enough for the oldest request
+    to age out instead of hitting the API and burning time on 429 backoff.
+    """
+
+    def __init__(self, max_requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE):
+        self.max_requests_per_minute = max_requests_per_minute
+        self._window_seconds = 60.0
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve a request slot and return how long the caller should wait.
+
+        Returns 0.0 when the request can go out immediately. Safe to call
+        from worker threads; the returned delay can be slept synchronously
+        or awaited via asyncio.sleep.
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            # Drop timestamps that have aged out of the window
+            cutoff = now - self._window_seconds
+            while self._timestamps and self._timestamps[0] <= cutoff:
+                self._timestamps.popleft()
+
+            if len(self._timestamps) < self.max_requests_per_minute:
+                self._timestamps.append(now)
+                return 0.0
+
+            # Window is full: schedule this request for when the oldest
+            # reservation expires (accounting for others already queued)
+            overflow = len(self._timestamps) - self.max_requests_per_minute
+            ready_at = self._timestamps[overflow] + self._window_seconds
+            self._timestamps.append(ready_at)
+            return max(0.0, ready_at - now)
+
+    def acquire(self):
+        """Block until a request slot is available."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Shared limiter for all agent runs in the process
+agent_rate_limiter = RateLimiter()
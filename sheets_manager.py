@@ -1,6 +1,27 @@
 #!/usr/bin/env python3
 import json
 import gspread
+
+# orjson handles the large Topics_JSON payloads several times faster than the
+# stdlib; fall back silently when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_json(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+def _loads_json(text: str):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
 from google.oauth2.service_account import Credentials
 from datetime import datetime
 from typing import Optional, Dict, List
@@ -363,8 +384,7 @@ class SheetsManager:
                     last_updated = record.get('Topics_Last_Updated', '')
 
                     if topics_json:
-                        import json
-                        topics = json.loads(topics_json)
+                        topics = _loads_json(topics_json)
                         return {
                             'topics': topics,
                             'last_updated': last_updated
@@ -384,7 +404,6 @@ class SheetsManager:
             topics: List of blog post titles
         """
         try:
-            import json
             print(f"📝 Attempting to save {len(topics)} topics for {blog_url}")
             worksheet = self.spreadsheet.worksheet('Blog_Sources')
             records = worksheet.get_all_records()
@@ -398,7 +417,7 @@ class SheetsManager:
                     print(f"🔄 Updating existing row {row_num}")
                     break
 
-            topics_json = json.dumps(topics)
+            topics_json = _dumps_json(topics)
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
             if row_num: